@@ -23,14 +23,15 @@
 #    3. Proxy Algorand node (AlgoNode) requests to avoid browser-side geo-blocks.
 #
 #    4. Read the live on-chain registry directly from Algorand Box Storage —
-#       no local database, no caching, full trustlessness.
+#       no local database; a short-lived in-process cache (seconds) absorbs
+#       bursts of verification traffic without trusting any stored copy.
 #
 #  FORENSIC PIPELINE (compute-hash + verify)
 #  ------------------------------------------
 #    Raw Image
 #      → Layer 1: Median Blur (3×3)       — strips adversarial noise
 #      → Layer 2: Grayscale + Resize 32×32 — normalises resolution
-#      → Layer 3: 2D DCT (dctn_numpy)     — extracts frequency skeleton
+#      → Layer 3: 2D DCT (basis matmul)   — extracts frequency skeleton
 #      → Layer 4: 8×8 Low-Pass Filter     — discards high-freq noise
 #      → Layer 5: Median Bitmask          — encodes 64-bit Visual DNA
 #
@@ -42,15 +43,27 @@
 #
 # =============================================================================
 
-from fastapi import FastAPI, File, UploadFile
+from fastapi import BackgroundTasks, FastAPI, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from PIL import Image, ImageFilter
-import imagehash
+from fastapi.responses import ORJSONResponse
+from PIL import Image
+import cv2
 import io
 import base64
 import os
 import hashlib
+import shutil
+import tempfile
+import threading
+import functools
+import logging
+import time
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 import numpy as np
 from pathlib import Path
 from dotenv import load_dotenv
@@ -65,17 +78,71 @@ load_dotenv(Path(__file__).parent / '.env')
 
 cloudinary.config(cloudinary_url=os.getenv("CLOUDINARY_URL", ""))
 
+# ── Logging ───────────────────────────────────────────────────────────────────
+# Per-transform and per-box trace lines are DEBUG, so a normal /verify only
+# formats a handful of messages. Set LOG_LEVEL=DEBUG to see the full trace.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+logger = logging.getLogger("veritas")
+# httpx logs every request at INFO — one line per registry box on a refresh
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
 # ── Algorand Testnet Configuration ────────────────────────────────────────────
 # AlgoNode public gateway — no API key required for Testnet reads.
 # APP_ID references the live VeritasRegistry contract on Algorand Testnet.
 ALGOD_URL = "https://testnet-api.algonode.cloud"
 APP_ID    = 755806101   # VeritasRegistry — Algorand Testnet
 
+# ── Outbound HTTP (blocking paths) ────────────────────────────────────────────
+# One pooled session for the blocking calls — the AlgoNode proxy endpoints and
+# Cloudinary original downloads — so repeat calls reuse keep-alive TLS
+# connections instead of paying a fresh TCP + TLS handshake each time.
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Connection cap for the concurrent registry box reads (_read_registry_boxes)
+_ALGOD_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+
+# ── Registry cache ────────────────────────────────────────────────────────────
+# Reading the registry costs one AlgoNode round-trip per registered box, so the
+# decoded result is kept in-process for a few seconds. Repeated /verify calls
+# inside that window share a single chain read. The snapshot is keyed by APP_ID
+# and also carries every pHash packed into one uint64 array (see
+# _pack_registry_hashes) so /verify scores the whole registry in one pass.
+_CACHE_TTL      = 10.0   # seconds
+_REGISTRY_CACHE = {
+    "ts": 0.0, "app_id": None, "data": {}, "failed": False,
+    "hashes": np.empty(0, dtype=np.uint64), "hexes": [], "owners": [],
+}
+# The chain read in flight, if any. When the snapshot expires under load, one
+# request starts the re-read and every other request awaits the same task, so
+# they all get its result at once — a failed read included.
+_REGISTRY_REFRESH: asyncio.Task | None = None
+
+# ── Verification thresholds ───────────────────────────────────────────────────
+# A best Hamming distance ≤ PLAGIARISM_DISTANCE is a modified copy; above it the
+# suspect is "Clear". /verify stops testing further transforms once the best
+# distance is at or below EARLY_EXIT_DISTANCE: that is already well inside the
+# plagiarism band, and the exact registered file scores 0 on "Original" (tested
+# first) because compute_phash_u64 reproduces the registration-time
+# imagehash.phash() bits (tests/test_phash_compat.py), so the remaining
+# transforms could only lower the reported score — never the verdict.
+PLAGIARISM_DISTANCE = 15
+EARLY_EXIT_DISTANCE = 2
+
+# ── Upload result cache ───────────────────────────────────────────────────────
+# Pipeline outputs keyed by (endpoint kind, SHA-256 of the uploaded bytes), so
+# retrying or re-checking the same file skips decoding and hashing entirely.
+# The pHash ("phash") is shared: /verify and /analyze seed it for /compute-hash.
+# Hashes depend only on the image bytes — never on the (changing) registry.
+_UPLOAD_CACHE_SIZE = 512
+_UPLOAD_CACHE: OrderedDict = OrderedDict()
+
 
 # =============================================================================
 #  UTILITY FUNCTIONS
 # =============================================================================
 
+@functools.lru_cache(maxsize=4096)
 def encode_algorand_address(pk_bytes: bytes) -> str:
     """
     Convert a raw 32-byte Algorand public key into a human-readable address.
@@ -83,6 +150,7 @@ def encode_algorand_address(pk_bytes: bytes) -> str:
     Algorand addresses are: base32( pubkey + last_4_bytes_of_sha512/256(pubkey) )
     This replicates algosdk.encoding.encode_address() without requiring the
     Python algosdk package (removed to avoid dependency issues on Python 3.14+).
+    Memoised per key: every registry refresh re-encodes the same few owners.
 
     Parameters
     ----------
@@ -98,51 +166,54 @@ def encode_algorand_address(pk_bytes: bytes) -> str:
     return base64.b32encode(pk_bytes + chksum).decode().upper().rstrip("=")
 
 
-def dctn_numpy(arr: np.ndarray) -> np.ndarray:
+def dct_basis(n: int) -> np.ndarray:
     """
-    Pure NumPy 2D Type-II Discrete Cosine Transform with ortho normalization.
+    Type-II DCT basis matrix — a fixed n×n constant.
 
-    This is a drop-in replacement for scipy.fft.dctn (which has no wheels for
-    Python 3.14+). It uses the standard FFT-based DCT algorithm:
+    For the fixed 32×32 pHash grid the 2D DCT is just two small matrix
+    products, so no FFT planning or per-row Python calls are needed:
 
-        DCT[k] = Re( exp(-j·π·k / 2N) · FFT([x, x_reversed]) )
+        DCT2D(X) = C @ X @ C.T     with  C[k, i] = 2 · cos(π·(2i+1)·k / 2n)
 
-    Normalisation (ortho):
-        coefficient[0]  /= sqrt(4N)
-        coefficient[k>0] /= sqrt(2N)
+    This is the unnormalised convention of scipy.fftpack.dct (type 2), which
+    is what imagehash.phash uses internally. Keeping the same scaling matters:
+    the median threshold compares DC-row/column coefficients against the rest,
+    so any other normalisation would flip bits relative to the hashes already
+    stored on-chain.
 
-    The transform is applied row-wise first, then column-wise (separable 2D DCT).
+    Built with plain NumPy (scipy has no wheels for Python 3.14+).
 
     Parameters
     ----------
-    arr : np.ndarray
-        2D float array (typically 32×32 grayscale pixel values).
+    n : int
+        Transform length (32 for the pHash grid).
 
     Returns
     -------
     np.ndarray
-        2D DCT coefficient matrix — same shape as input.
-    """
-    def _dct1d(x: np.ndarray) -> np.ndarray:
-        N = len(x)
-        # Mirror the signal: [x, x_reversed] — standard DCT-II via FFT trick
-        v = np.empty(2 * N)
-        v[:N] = x
-        v[N:] = x[::-1]
-        # Take real FFT, keep first N components
-        V = np.fft.rfft(v)[:N]
-        # Apply phase shift to convert DFT → DCT
-        k = np.arange(N, dtype=float)
-        phase = np.exp(-1j * np.pi * k / (2.0 * N))
-        result = np.real(phase * V)
-        # Ortho normalisation
-        result[0] /= np.sqrt(4.0 * N)
-        result[1:] /= np.sqrt(2.0 * N)
-        return result
-
-    # Apply 1D DCT along rows (axis=1), then columns (axis=0)
-    tmp = np.apply_along_axis(_dct1d, 1, arr.astype(float))
-    return np.apply_along_axis(_dct1d, 0, tmp)
+        n×n float64 basis matrix; row k is the k-th cosine basis vector.
+    """
+    k = np.arange(n, dtype=float)[:, None]
+    i = np.arange(n, dtype=float)[None, :]
+    return 2.0 * np.cos(np.pi * (2.0 * i + 1.0) * k / (2.0 * n))
+
+
+# Precomputed once at import — shared by every /analyze call.
+# pHash keeps only the top-left 8×8 DCT block, so only the first 8 basis rows
+# are ever needed: (8,32) @ (32,32) @ (32,8) is ~1/16 of the full 2D DCT.
+#
+# Kept in float64, matching scipy.fftpack: genuine low-pass coefficients of
+# real tiles go down to ~1e-8 of the DC term, which float32 rounding
+# (~1e-7 relative) cannot resolve.
+DCT_BASIS_8x32 = dct_basis(32)[:8]                       # shape (8, 32)
+
+# Coefficients that a flat or symmetric tile cancels come out of
+# scipy.fftpack as exactly 0.0, but as ±1e-10 rounding residue from the
+# matmul; left alone, the median test turns that residue into hash bits
+# (a solid colour would hash 808080008040c480 instead of 8000000000000000).
+# float64 residue stays below ~1e-14 of the DC term, so anything under
+# DCT_ZERO_TOL · |DC| is snapped back to the exact zero fftpack produces.
+DCT_ZERO_TOL = 1e-12
 
 
 # =============================================================================
@@ -153,8 +224,81 @@ app = FastAPI(
     title="Veritas Protocol API — Testnet",
     description="AI-powered visual copyright forensics engine backed by Algorand blockchain.",
     version="1.0.0",
+    # orjson serialises the response dicts (e.g. the full /registry map) in C
+    default_response_class=ORJSONResponse,
 )
 
+# ── Upload size cap ───────────────────────────────────────────────────────────
+# Oversized requests are refused with 413 before Starlette spools the multipart
+# body. A Content-Length over the cap is rejected up front; chunked uploads
+# (no Content-Length) are counted as they stream in, and the 413 goes out as
+# soon as the running total passes the cap. Registered ahead of CORS so the
+# rejection still carries CORS headers and the browser can read it.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 20 * 1024 * 1024))
+
+
+def upload_too_large() -> ORJSONResponse:
+    return ORJSONResponse(
+        {"error": f"Upload too large — the limit is {MAX_UPLOAD_BYTES / (1024 * 1024):g} MB."},
+        status_code=413,
+    )
+
+
+def limit_upload_size(app):
+    """
+    Pure ASGI middleware enforcing MAX_UPLOAD_BYTES on the request body.
+
+    Wraps `receive` to count body bytes. Once the total passes the cap it sends
+    the 413 itself, reports a client disconnect to the app so body parsing
+    stops, and drops whatever the app tries to send or raise afterwards.
+    """
+    async def middleware(scope, receive, send):
+        if scope["type"] != "http":
+            await app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > MAX_UPLOAD_BYTES:
+            await upload_too_large()(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+        started = False
+
+        async def counted_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > MAX_UPLOAD_BYTES:
+                    rejected = True
+                    if not started:
+                        await upload_too_large()(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if rejected:
+                return
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await app(scope, counted_receive, guarded_send)
+        except Exception:
+            # The app failing to read a body it was cut off from is expected
+            if not rejected:
+                raise
+
+    return middleware
+
+
+app.add_middleware(limit_upload_size)
+
 # Allow all origins — frontend (Vercel) and local dev both need cross-origin access
 app.add_middleware(
     CORSMiddleware,
@@ -163,13 +307,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ── Pillow version compatibility ───────────────────────────────────────────────
-# Image.Transpose enum was introduced in Pillow 9.1.
-# Fall back to the legacy integer constant for older environments.
-try:
-    _FLIP_LR = Image.Transpose.FLIP_LEFT_RIGHT
-except AttributeError:
-    _FLIP_LR = Image.FLIP_LEFT_RIGHT  # type: ignore[attr-defined]
+
+def as_rgb(img: Image.Image) -> Image.Image:
+    """
+    Return `img` in RGB mode, converting only if needed.
+
+    Image.convert() always returns a full copy — even RGB → RGB — so every
+    pipeline stage that normalised its input used to duplicate the whole
+    frame. /verify converts the upload once and the stages below reuse it.
+    """
+    return img if img.mode == "RGB" else img.convert("RGB")
 
 
 def pad_to_scale(img: Image.Image, factor: float) -> Image.Image:
@@ -194,7 +341,7 @@ def pad_to_scale(img: Image.Image, factor: float) -> Image.Image:
     -------
     PIL Image — the padded image, ready for pHash computation
     """
-    rgb = img.convert("RGB")
+    rgb = as_rgb(img)
     w, h = rgb.size
     nw, nh = int(w * factor), int(h * factor)
     # Neutral grey (128, 128, 128) minimises bias in DCT low-frequency coefficients
@@ -204,32 +351,44 @@ def pad_to_scale(img: Image.Image, factor: float) -> Image.Image:
 
 
 # =============================================================================
-#  SYMMETRY TRANSFORM TABLE
+#  SYMMETRY TRANSFORM TABLES
 #  ─────────────────────────────────────────────────────────────────────────────
 #  During verification, the suspect image is tested in all 13 orientations below.
-#  The minimum Hamming distance across all transforms is used as the final score.
+#  The best Hamming distance found is the final score; the scan stops early once
+#  it is within EARLY_EXIT_DISTANCE, so it is the minimum only if none got that close.
 #
 #  Coverage:
 #    · 8-way D4 dihedral group  →  all rigid symmetries (rotations + mirrors)
 #    · Zoom-out variants        →  reverses crop/zoom plagiarism attacks
 #    · Zoom-out + mirror        →  compound crop + flip attacks
+#
+#  The D4 group commutes with denoise + grayscale + resize (up to ±1 grey level
+#  of resize rounding), so the eight rigid symmetries are applied to the single
+#  32×32 tile of the suspect instead of to the full-resolution image — one
+#  denoise + resize per request instead of eight. The zoom-out variants change
+#  the framing, so each scale runs the full pipeline on a padded image once;
+#  its mirrored variant is then flipped on that scale's 32×32 tile.
 # =============================================================================
-SYMMETRY_TRANSFORMS = [
-    # ── D4 Dihedral Group (8-way rigid symmetry) ──────────────────────────────
-    ("Original",                    lambda img: img),
-    ("90deg Rotation",              lambda img: img.rotate(90, expand=True)),
-    ("180deg Rotation",             lambda img: img.rotate(180)),
-    ("270deg Rotation",             lambda img: img.rotate(270, expand=True)),
-    ("Horizontal Mirror",           lambda img: img.transpose(_FLIP_LR)),
-    ("Mirrored 90deg Rotation",     lambda img: img.rotate(90, expand=True).transpose(_FLIP_LR)),
-    ("Mirrored 180deg Rotation",    lambda img: img.rotate(180).transpose(_FLIP_LR)),
-    ("Mirrored 270deg Rotation",    lambda img: img.rotate(270, expand=True).transpose(_FLIP_LR)),
+D4_TRANSFORMS = [
+    # ── D4 Dihedral Group (8-way rigid symmetry) on a 32×32 ndarray ───────────
+    ("Original",                    lambda a: a),
+    ("90deg Rotation",              lambda a: np.rot90(a, 1)),
+    ("180deg Rotation",             lambda a: np.rot90(a, 2)),
+    ("270deg Rotation",             lambda a: np.rot90(a, 3)),
+    ("Horizontal Mirror",           lambda a: a[:, ::-1]),
+    ("Mirrored 90deg Rotation",     lambda a: np.rot90(a, 1)[:, ::-1]),
+    ("Mirrored 180deg Rotation",    lambda a: np.rot90(a, 2)[:, ::-1]),
+    ("Mirrored 270deg Rotation",    lambda a: np.rot90(a, 3)[:, ::-1]),
+]
+
+ZOOM_TRANSFORMS = [
     # ── Zoom-invariance (pad to simulate unzooming the suspect image) ─────────
-    ("Zoom-out x1.25",              lambda img: pad_to_scale(img, 1.25)),
-    ("Zoom-out x1.5",               lambda img: pad_to_scale(img, 1.50)),
-    ("Zoom-out x2.0",               lambda img: pad_to_scale(img, 2.00)),
-    ("Zoom-out x1.25 + Mirror",     lambda img: pad_to_scale(img, 1.25).transpose(_FLIP_LR)),
-    ("Zoom-out x1.5  + Mirror",     lambda img: pad_to_scale(img, 1.50).transpose(_FLIP_LR)),
+    # (name, canvas scale for pad_to_scale, transform on that scale's tile)
+    ("Zoom-out x1.25",              1.25, lambda a: a),
+    ("Zoom-out x1.5",               1.50, lambda a: a),
+    ("Zoom-out x2.0",               2.00, lambda a: a),
+    ("Zoom-out x1.25 + Mirror",     1.25, lambda a: a[:, ::-1]),
+    ("Zoom-out x1.5  + Mirror",     1.50, lambda a: a[:, ::-1]),
 ]
 
 
@@ -246,21 +405,241 @@ def denoise(img: Image.Image) -> Image.Image:
 
     Both the original (at registration time) and the suspect image (at
     verification time) go through this filter, ensuring fair comparison.
+
+    Runs on OpenCV's SIMD medianBlur, which is bit-identical to Pillow's
+    MedianFilter(size=3) (same replicated-edge border) but far faster on
+    large uploads. Returns a PIL image so callers are unchanged.
     """
-    return img.convert("RGB").filter(ImageFilter.MedianFilter(size=3))
+    rgb = np.asarray(as_rgb(img))
+    return Image.fromarray(cv2.medianBlur(rgb, 3))
 
 
-def compute_phash(img: Image.Image) -> imagehash.ImageHash:
+def compute_phash_u64(img: Image.Image) -> int:
     """
-    Compute the 64-bit perceptual hash (Visual DNA) of an image.
+    Compute the 64-bit perceptual hash (Visual DNA) of an image, as a plain int.
 
-    Pipeline: Denoise (Median Blur) → imagehash.phash()
-      imagehash.phash() internally performs:
-        Grayscale → Resize 32×32 → 2D DCT → 8×8 low-pass → Median bitmask
+    Pipeline: Denoise (Median Blur) → Grayscale → Resize 32×32 → phash_kernel
+      (8×8 low-pass DCT → Median bitmask) — the same bits as the
+      imagehash.phash(denoise(img)) rule every registered hash was built with.
+      tests/test_phash_compat.py keeps imagehash as the reference and checks
+      this on flat, centred, striped and photographic fixtures.
 
     Always applies denoise first — matching the behaviour used at registration.
+    Format as f"{h:016x}" for the hex string stored on-chain.
     """
-    return imagehash.phash(denoise(img))
+    return int(phash_from_tiles(gray_tile(img)[None])[0])
+
+
+def gray_tile(img: Image.Image) -> np.ndarray:
+    """
+    Denoise → Grayscale → Resize 32×32 (LANCZOS), returned as a float64 array.
+
+    Same denoise, "L" conversion and LANCZOS resize as the reference
+    imagehash.phash(), so the kernel sees the same 32×32 pixels.
+    """
+    gray = denoise(img).convert("L").resize((32, 32), Image.LANCZOS)
+    return np.asarray(gray, dtype=np.float64)
+
+
+def phash_kernel(tiles: np.ndarray) -> tuple:
+    """
+    The pHash kernel shared by /verify, /compute-hash and /analyze.
+
+    Takes a stack of 32×32 grayscale tiles, shape (B, 32, 32). One batched
+    product against DCT_BASIS_8x32 yields every 8×8 low-pass block at once;
+    each block is thresholded at the median of its own 64 coefficients (DC
+    included). Matmul rounding residue is snapped to zero first (see
+    DCT_ZERO_TOL), so the bits match imagehash.phash() on each tile — including
+    flat and symmetric artwork. tests/test_phash_compat.py checks this.
+
+    Returns
+    -------
+    tuple
+        (low_freq, medians, bits) — (B, 8, 8) DCT coefficients, (B,) median
+        thresholds and the (B, 64) boolean bitmasks in MSB-first order.
+    """
+    low_freq = DCT_BASIS_8x32 @ tiles @ DCT_BASIS_8x32.T          # (B, 8, 8)
+    dc       = np.abs(low_freq[:, :1, :1])
+    low_freq = np.where(np.abs(low_freq) <= DCT_ZERO_TOL * dc, 0.0, low_freq)
+    coeffs   = low_freq.reshape(len(tiles), 64)
+    # Median of 64 values = mean of the two middle ones (np.median's rule),
+    # found by an O(n) selection instead of np.median's general machinery
+    middle   = np.partition(coeffs, (31, 32), axis=1)
+    medians  = (middle[:, 31] + middle[:, 32]) / 2
+    bits     = coeffs > medians[:, None]                          # (B, 64)
+    return low_freq, medians, bits
+
+
+def phash_from_tiles(tiles: np.ndarray) -> np.ndarray:
+    """
+    64-bit pHashes of a stack of 32×32 grayscale tiles, shape (B, 32, 32).
+
+    Returns
+    -------
+    np.ndarray
+        (B,) uint64 array of pHashes (phash_kernel bitmasks packed MSB-first).
+    """
+    _, _, bits = phash_kernel(tiles)
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+# Zoom-out scales are tiled concurrently. Padding, median blur and resize
+# all release the GIL, so threads overlap them without pickling the
+# (possibly very large) suspect image into worker processes.
+# The pool is shared by every request and sized to the machine; each /verify
+# claims a slot for its three tiles, and when all slots are taken (the pool is
+# already busy with other requests) it builds them inline on its own worker
+# thread instead of queueing — parallelism within one request is only a win
+# while there are idle cores to give it.
+_ZOOM_WORKERS = os.cpu_count() or 1
+_ZOOM_POOL    = ThreadPoolExecutor(max_workers=_ZOOM_WORKERS, thread_name_prefix="veritas-zoom")
+_ZOOM_SLOTS   = threading.BoundedSemaphore(max(1, _ZOOM_WORKERS // 3))
+
+
+def _zoom_tile(factor: float, img: Image.Image) -> np.ndarray | None:
+    """32×32 tile of the suspect padded to `factor`; None (logged) if it fails."""
+    try:
+        return gray_tile(pad_to_scale(img, factor))
+    except Exception as te:
+        logger.warning("[VERIFY] Transform error (Zoom-out x%s): %s", factor, te)
+        return None
+
+
+def suspect_hashes(img: Image.Image):
+    """
+    Yield (transform_name, pHash as a 64-bit int) for all 13 verification transforms.
+
+    The eight D4 symmetries are hashed together from one 32×32 tile of the
+    suspect; the five zoom-out variants come from three padded tiles (one per
+    scale, built in parallel on _ZOOM_POOL when it has a free slot, inline
+    otherwise) hashed in a second batch. Hashes
+    are produced lazily so /verify can stop at a close match without paying
+    for the zoom stage at all.
+    A transform that fails is logged and skipped.
+    """
+    try:
+        tile = gray_tile(img)
+    except Exception as te:
+        logger.warning("[VERIFY] Transform error (D4 tile): %s", te)
+        tile = None
+
+    if tile is not None:
+        # All eight symmetries are hashed together in one batched DCT
+        stack = np.stack([transform_fn(tile) for _, transform_fn in D4_TRANSFORMS])
+        for (transform_name, _), suspect_u64 in zip(D4_TRANSFORMS, phash_from_tiles(stack).tolist()):
+            yield transform_name, suspect_u64
+
+    # Built only once the D4 stage has been consumed without an early exit
+    factors = dict.fromkeys(factor for _, factor, _ in ZOOM_TRANSFORMS)
+    if _ZOOM_SLOTS.acquire(blocking=False):
+        futures = {factor: _ZOOM_POOL.submit(_zoom_tile, factor, img) for factor in factors}
+        try:
+            tiles = {factor: future.result() for factor, future in futures.items()}
+        finally:
+            for future in futures.values():
+                future.cancel()
+            _ZOOM_SLOTS.release()
+    else:
+        tiles = {factor: _zoom_tile(factor, img) for factor in factors}
+
+    zoomed = [(name, transform_fn(tiles[factor]))
+              for name, factor, transform_fn in ZOOM_TRANSFORMS if tiles[factor] is not None]
+    if zoomed:
+        stack = np.stack([tile for _, tile in zoomed])
+        for (transform_name, _), suspect_u64 in zip(zoomed, phash_from_tiles(stack).tolist()):
+            yield transform_name, suspect_u64
+
+
+def decode_upload(f) -> Image.Image:
+    """Fully decode a spooled upload file as RGB — all 13 transforms share it."""
+    img = as_rgb(Image.open(f))
+    img.load()
+    return img
+
+
+def score_suspects(suspects, snapshot: dict) -> tuple:
+    """
+    Score suspect hashes against the registry snapshot, nearest match first.
+
+    `suspects` yields (transform_name, pHash as int) — suspect_hashes() or a
+    cached list of its output. Each is compared with every stored hash in one
+    vectorised XOR + SIMD popcount over the packed uint64 column; scanning
+    stops once the best distance is within EARLY_EXIT_DISTANCE.
+
+    Returns
+    -------
+    tuple
+        (best_distance, best_index, best_transform, scanned, complete) —
+        best_distance is None if no transform could be hashed; `scanned` lists
+        the (name, hash) pairs consumed, and `complete` is False after an
+        early exit.
+    """
+    stored_hashes = snapshot["hashes"]
+    stored_hexes  = snapshot["hexes"]
+
+    best_distance  = None
+    best_index     = None
+    best_transform = "Original"
+    scanned        = []
+
+    for transform_name, suspect_u64 in suspects:
+        scanned.append((transform_name, suspect_u64))
+        distances = np.bitwise_count(stored_hashes ^ np.uint64(suspect_u64))
+        idx       = int(distances.argmin())
+        distance  = int(distances[idx])
+        logger.debug("[VERIFY] %-28s dist=%3d vs %.8s...", transform_name, distance, stored_hexes[idx])
+
+        if best_distance is None or distance < best_distance:
+            best_distance  = distance
+            best_index     = idx
+            best_transform = transform_name
+
+        # Near-exact match — further transforms cannot change the verdict
+        if best_distance <= EARLY_EXIT_DISTANCE:
+            return best_distance, best_index, best_transform, scanned, False
+
+    return best_distance, best_index, best_transform, scanned, True
+
+
+def warm_up_pipeline() -> None:
+    """
+    Run every verification transform once on a blank image at import time.
+
+    The first call otherwise pays one-off start-up costs on the request path:
+    Pillow plugin registration, OpenCV and BLAS initialisation, and spawning
+    the _ZOOM_POOL worker threads.
+    """
+    Image.init()
+    for _ in suspect_hashes(Image.new("RGB", (64, 64), (128, 128, 128))):
+        pass
+
+
+warm_up_pipeline()
+
+
+def upload_sha256(f) -> str:
+    """SHA-256 of a spooled upload file, streamed; leaves it rewound for decoding."""
+    f.seek(0)
+    digest = hashlib.file_digest(f, "sha256").hexdigest()
+    f.seek(0)
+    return digest
+
+
+def _upload_cache_get(kind: str, sha256_hex: str):
+    """Return the cached result for this upload (marking it recent), or None."""
+    key = (kind, sha256_hex)
+    if key not in _UPLOAD_CACHE:
+        return None
+    _UPLOAD_CACHE.move_to_end(key)
+    return _UPLOAD_CACHE[key]
+
+
+def _upload_cache_put(kind: str, sha256_hex: str, value) -> None:
+    """Store a result for this upload, evicting the least recently used entry."""
+    _UPLOAD_CACHE[(kind, sha256_hex)] = value
+    _UPLOAD_CACHE.move_to_end((kind, sha256_hex))
+    while len(_UPLOAD_CACHE) > _UPLOAD_CACHE_SIZE:
+        _UPLOAD_CACHE.popitem(last=False)
 
 
 def get_original_sha256_from_cloudinary(phash_str: str) -> str | None:
@@ -276,71 +655,250 @@ def get_original_sha256_from_cloudinary(phash_str: str) -> str | None:
       · Exact original file   →  SHA-256 matches  →  "Original Verified"
       · Derivative work       →  SHA-256 differs  →  "Plagiarism Detected"
 
+    Successful lookups are memoised (see _original_sha256), so re-verifying a
+    known artwork costs no Cloudinary traffic after the first match.
+
     Returns None if Cloudinary is unavailable — the caller falls back to
     treating the image as "Original Verified" (safe default).
     """
     try:
-        resource = cloudinary.api.resource(f"veritas/artwork_{phash_str}")
-        url = resource.get("secure_url", "")
-        if url:
-            r = requests.get(url, timeout=15)
-            return hashlib.sha256(r.content).hexdigest()
+        return _original_sha256(phash_str)
     except Exception as e:
-        print(f"[CLOUDINARY] Could not fetch original for SHA-256 comparison: {e}")
+        logger.warning("[CLOUDINARY] Could not fetch original for SHA-256 comparison: %s", e)
     return None
 
 
-def fetch_registry_from_chain() -> dict:
+@functools.lru_cache(maxsize=4096)
+def _original_sha256(phash_str: str) -> str:
     """
-    Read the complete artwork registry live from Algorand Testnet Box Storage.
+    SHA-256 of the archived original for `phash_str`, memoised per pHash.
+
+    Archived originals are immutable (public_id is keyed by pHash and uploaded
+    with overwrite=False), so a computed checksum never goes stale. Every
+    failure raises instead of returning, so lru_cache never stores a miss.
+    """
+    resource = cloudinary.api.resource(f"veritas/artwork_{phash_str}")
+    url = resource.get("secure_url", "")
+    if not url:
+        raise LookupError(f"no archived original for artwork_{phash_str}")
+    r = HTTP_SESSION.get(url, timeout=15)
+    r.raise_for_status()
+    return hashlib.sha256(r.content).hexdigest()
+
 
-    No local database or cache is used. Every call hits the blockchain directly,
-    guaranteeing that the registry state is always current and trustless.
+def spool_to_disk(fileobj) -> str:
+    """
+    Copy an upload file to a private temp file on disk and return its path.
+
+    Starlette closes the upload once the response is sent, so a background
+    task needs its own copy; copying in chunks keeps the bytes out of memory.
+    The caller owns the file and must delete it (archive_original does).
+    """
+    fileobj.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="veritas-", delete=False) as tmp:
+        shutil.copyfileobj(fileobj, tmp)
+    return tmp.name
+
+
+def archive_original(path: str, phash_str: str) -> None:
+    """
+    Archive a registered original to Cloudinary as veritas/artwork_{phash_str}.
+
+    Runs as a /compute-hash background task, after the response is sent, and
+    streams the upload from the temp file written by spool_to_disk, which is
+    deleted afterwards. overwrite=False ensures a re-registration attempt
+    doesn't overwrite the original. Failure is non-fatal — the SHA-256
+    derivative check is simply skipped at verify time.
+    """
+    try:
+        upload_result = cloudinary.uploader.upload(
+            path,
+            folder="veritas",
+            public_id=f"artwork_{phash_str}",
+            resource_type="image",
+            overwrite=False,
+        )
+        logger.info("[CLOUDINARY] Uploaded: %s", upload_result.get("secure_url", ""))
+    except Exception as ce:
+        logger.warning("[CLOUDINARY] Upload error (non-fatal): %s", ce)
+    finally:
+        os.remove(path)
+
+
+async def fetch_registry_from_chain(force_refresh: bool = False) -> dict:
+    """
+    Return the complete artwork registry as stored in Algorand Testnet Box Storage.
+
+    Results are served from a short-lived in-process cache (_CACHE_TTL seconds)
+    so bursts of requests do not each pay N+1 AlgoNode round-trips. Pass
+    force_refresh=True to bypass the cache and re-read the chain immediately.
+
+    Returns
+    -------
+    dict
+        { "f3a7b2c9...": "NWAZYJJA...", ... }
+        Empty dict if the app has no boxes, or if AlgoNode is unreachable and
+        no registry was read before; a failed re-read returns the last good one.
+    """
+    return (await _load_registry(force_refresh))["data"]
+
+
+async def _load_registry(force_refresh: bool = False) -> dict:
+    """
+    Return the current registry snapshot, re-reading the chain only when stale.
+
+    A snapshot is { "ts", "app_id", "data": {phash_hex: owner}, "failed",
+    "hashes", "hexes", "owners" } where the last three are the parallel arrays
+    built by _pack_registry_hashes. A failed chain read is never cached, so
+    the next request after it retries: until then the last good snapshot for
+    this APP_ID keeps being served, or — if none was ever read — an empty
+    snapshot with "failed": True.
+    Concurrent refreshes are collapsed into one chain read (_REGISTRY_REFRESH)
+    whose result, success or failure, goes to every request waiting on it;
+    force_refresh only accepts a read that started after it was called.
+    """
+    global _REGISTRY_REFRESH
+
+    cached = _REGISTRY_CACHE
+    if (not force_refresh
+            and cached["app_id"] == APP_ID
+            and time.monotonic() - cached["ts"] < _CACHE_TTL):
+        return cached
+
+    # A forced refresh must see boxes written before it was asked for, so it
+    # cannot join a read that was already in flight: wait that one out, then
+    # start (or join another forced caller's) read begun after this call
+    in_flight = _REGISTRY_REFRESH if force_refresh else None
+    if in_flight is not None:
+        await asyncio.wait([in_flight])
+
+    if _REGISTRY_REFRESH is None or _REGISTRY_REFRESH is in_flight:
+        _REGISTRY_REFRESH = asyncio.create_task(_refresh_registry(_REGISTRY_CACHE))
+        _REGISTRY_REFRESH.add_done_callback(_refresh_finished)
+    # Shielded: a client disconnecting must not cancel the read the others share
+    return await asyncio.shield(_REGISTRY_REFRESH)
+
+
+def _refresh_finished(task: asyncio.Task) -> None:
+    """Done callback: let the next stale request start a fresh chain read."""
+    global _REGISTRY_REFRESH
+    if _REGISTRY_REFRESH is task:
+        _REGISTRY_REFRESH = None
+
+
+async def _refresh_registry(cached: dict) -> dict:
+    """Re-read the chain and install a new snapshot (see _load_registry)."""
+    global _REGISTRY_CACHE
+
+    try:
+        registry = await _read_registry_boxes()
+    except Exception as e:
+        logger.error("[CHAIN] Error reading boxes: %s", e)
+        # One failed box read (e.g. a 429 from AlgoNode) must not blank the
+        # registry: keep serving the last good snapshot, left expired so the
+        # next request retries the chain
+        if _REGISTRY_CACHE["app_id"] == APP_ID:
+            return _REGISTRY_CACHE
+        registry = {}
+        hashes, hexes, owners = _pack_registry_hashes(registry)
+        return {"ts": 0.0, "app_id": APP_ID, "data": registry, "failed": True,
+                "hashes": hashes, "hexes": hexes, "owners": owners}
+
+    # Most refreshes find the registry unchanged — keep the already-parsed
+    # arrays instead of re-parsing every hex string on each TTL expiry
+    if cached["app_id"] == APP_ID and registry == cached["data"]:
+        hashes, hexes, owners = cached["hashes"], cached["hexes"], cached["owners"]
+    else:
+        hashes, hexes, owners = _pack_registry_hashes(registry)
+
+    _REGISTRY_CACHE = {
+        "ts":     time.monotonic(),
+        "app_id": APP_ID,
+        "data":   registry,
+        "failed": False,
+        "hashes": hashes,
+        "hexes":  hexes,
+        "owners": owners,
+    }
+    return _REGISTRY_CACHE
+
+
+def _pack_registry_hashes(registry: dict) -> tuple:
+    """
+    Pack every stored pHash into one contiguous uint64 array.
+
+    Done once per chain read instead of once per comparison in /verify.
+    Returns (hashes, hexes, owners): an np.uint64 array of shape (N,) plus
+    parallel lists of the original hex strings and owner addresses, so a
+    suspect hash is scored against the whole registry with one vectorised
+    XOR + popcount. Box keys that are not valid 64-bit hex are skipped (and
+    logged) rather than aborting the whole verification.
+    """
+    parsed: list = []
+    hexes:  list = []
+    owners: list = []
+    for phash_hex, owner in registry.items():
+        try:
+            phash_u64 = int(phash_hex, 16)
+        except ValueError:
+            phash_u64 = None
+        if phash_u64 is None or phash_u64 >> 64:
+            logger.warning("[CHAIN] Skipping malformed pHash key: %r", phash_hex)
+            continue
+        parsed.append(phash_u64)
+        hexes.append(phash_hex)
+        owners.append(owner)
+    hashes = np.fromiter(parsed, dtype=np.uint64, count=len(parsed))
+    return hashes, hexes, owners
+
+
+async def _read_registry_boxes() -> dict:
+    """
+    Read the complete artwork registry live from Algorand Testnet Box Storage.
 
     Process:
       1. GET /v2/applications/{APP_ID}/boxes  — list all registered box keys
-      2. For each box:
+      2. For every box, concurrently:
            a. Decode box name from base64 → strip "registered_hashes" prefix → pHash hex
            b. GET /v2/applications/{APP_ID}/box?name=b64:{name}  — read 32-byte value
            c. Decode value bytes → Algorand address (encode_algorand_address)
       3. Return dict { phash_hex: owner_address }
 
-    Returns
-    -------
-    dict
-        { "f3a7b2c9...": "NWAZYJJA...", ... }
-        Empty dict if the app has no boxes or if AlgoNode is unreachable.
+    The per-box GETs are issued together with asyncio.gather over one pooled
+    httpx.AsyncClient, so N boxes cost roughly one round-trip instead of N and
+    the event loop stays free while they are in flight. _ALGOD_LIMITS caps how
+    many are open at once so a large registry does not trip AlgoNode's rate
+    limiting; the rest queue on the pool.
+
+    Raises on any network or decoding error so a partial read is never cached.
     """
+    # Strip the BoxMap prefix inserted by Algorand Python's BoxMap type
+    BOX_PREFIX = "registered_hashes"
+
+    async with httpx.AsyncClient(base_url=ALGOD_URL, timeout=10, limits=_ALGOD_LIMITS) as client:
+        resp = await client.get(f"/v2/applications/{APP_ID}/boxes")
+        resp.raise_for_status()
+        box_names_b64 = [box_ref["name"] for box_ref in resp.json().get("boxes", [])]
+        logger.info("[CHAIN] Found %d box(es) in App %d", len(box_names_b64), APP_ID)
+
+        # Read every box value — a raw 32-byte Algorand public key — in parallel
+        box_resps = await asyncio.gather(*[
+            client.get(f"/v2/applications/{APP_ID}/box", params={"name": f"b64:{name}"})
+            for name in box_names_b64
+        ])
+
     registry: dict = {}
-    try:
-        resp = requests.get(f"{ALGOD_URL}/v2/applications/{APP_ID}/boxes", timeout=10)
-        box_list = resp.json().get("boxes", [])
-        print(f"[CHAIN] Found {len(box_list)} box(es) in App {APP_ID}")
-
-        for box_ref in box_list:
-            # Box name is base64-encoded bytes; decode to get the raw key string
-            box_name_b64   = box_ref["name"]
-            box_name_bytes = base64.b64decode(box_name_b64)
-            raw_key        = box_name_bytes.decode("utf-8", errors="replace")
-
-            # Strip the BoxMap prefix inserted by Algorand Python's BoxMap type
-            BOX_PREFIX = "registered_hashes"
-            phash_hex  = raw_key[len(BOX_PREFIX):] if raw_key.startswith(BOX_PREFIX) else raw_key
-
-            # Read the box value — a raw 32-byte Algorand public key
-            box_resp = requests.get(
-                f"{ALGOD_URL}/v2/applications/{APP_ID}/box",
-                params={"name": f"b64:{box_name_b64}"},
-                timeout=10,
-            )
-            value_bytes   = base64.b64decode(box_resp.json().get("value", ""))
-            owner_address = encode_algorand_address(value_bytes)
-
-            registry[phash_hex] = owner_address
-            print(f"[CHAIN] Loaded: {phash_hex[:8]}... -> {owner_address[:8]}...")
+    for box_name_b64, box_resp in zip(box_names_b64, box_resps):
+        # Box name is base64-encoded bytes; decode to get the raw key string
+        raw_key   = base64.b64decode(box_name_b64).decode("utf-8", errors="replace")
+        phash_hex = raw_key[len(BOX_PREFIX):] if raw_key.startswith(BOX_PREFIX) else raw_key
 
-    except Exception as e:
-        print(f"[CHAIN] Error reading boxes: {e}")
+        box_resp.raise_for_status()
+        value_bytes   = base64.b64decode(box_resp.json().get("value", ""))
+        owner_address = encode_algorand_address(value_bytes)
+
+        registry[phash_hex] = owner_address
+        logger.debug("[CHAIN] Loaded: %.8s... -> %.8s...", phash_hex, owner_address)
 
     return registry
 
@@ -372,7 +930,7 @@ async def algod_params():
     algosdk SuggestedParams shape (camelCase) before building transactions.
     """
     try:
-        r = requests.get(f"{ALGOD_URL}/v2/transactions/params", timeout=10)
+        r = await asyncio.to_thread(HTTP_SESSION.get, f"{ALGOD_URL}/v2/transactions/params", timeout=10)
         return r.json()
     except Exception as e:
         return {"error": str(e)}
@@ -390,23 +948,25 @@ async def algod_account(address: str):
     The frontend tops up the app account if its balance is insufficient.
     """
     try:
-        r = requests.get(f"{ALGOD_URL}/v2/accounts/{address}", timeout=10)
+        r = await asyncio.to_thread(HTTP_SESSION.get, f"{ALGOD_URL}/v2/accounts/{address}", timeout=10)
         return r.json()
     except Exception as e:
         return {"error": str(e)}
 
 
 @app.get("/registry")
-async def get_registry():
+async def get_registry(refresh: bool = False):
     """
-    Return the complete on-chain artwork registry, read live from Algorand Testnet.
+    Return the complete on-chain artwork registry, read from Algorand Testnet.
 
-    Calls fetch_registry_from_chain() on every request — no caching.
+    Served from the short-lived registry cache. Pass ?refresh=true to force a
+    fresh chain read — the frontend does this right after a registration so
+    the new artwork is visible to the next /verify without waiting for the TTL.
     Used by the frontend to display the registry count and wake the backend
     during the Render cold-start polling loop.
     """
     try:
-        registry = fetch_registry_from_chain()
+        registry = await fetch_registry_from_chain(force_refresh=refresh)
         return {
             "count": len(registry),
             "app_id": APP_ID,
@@ -421,50 +981,49 @@ async def get_registry():
 
 
 @app.post("/compute-hash")
-async def compute_hash(file: UploadFile = File(...)):
+async def compute_hash(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """
     STEP 1 — Compute the 64-bit Visual DNA signature of an artwork.
 
     The frontend calls this endpoint before building the Algorand transaction.
     The backend computes the pHash and archives the original image to Cloudinary
-    so it can later be used for SHA-256 derivative verification.
+    so it can later be used for SHA-256 derivative verification. The archive
+    upload runs as a background task after the response is sent, so it adds
+    no latency to the hash.
 
     Pipeline:
-        Upload → Median Blur → imagehash.phash() → 64-bit hex pHash
+        Upload → Median Blur → Grayscale 32×32 → phash_kernel → 64-bit hex pHash
 
     Returns
     -------
     JSON:
         phash         : str  — 64-bit hex pHash (the "Visual DNA")
         status        : str  — "ok"
-        cloudinary_url: str  — CDN URL of the archived original (may be empty
-                               if Cloudinary upload fails — non-fatal)
+        cloudinary_url: str  — CDN URL the original is being archived to (empty
+                               if Cloudinary is not configured)
     """
     try:
-        data  = await file.read()
-        img   = Image.open(io.BytesIO(data))
-        phash = compute_phash(img)
-        phash_str = str(phash)
-        print(f"[HASH] Computed pHash: {phash_str}")
-
-        # ── Archive original to Cloudinary ────────────────────────────────────
+        # Hash and decode straight from Starlette's spooled upload file — the
+        # raw bytes are never copied into memory
+        sha = await asyncio.to_thread(upload_sha256, file.file)
+        phash_u64 = _upload_cache_get("phash", sha)
+        if phash_u64 is None:
+            # CPU-bound decode + hash — off the event loop on a worker thread
+            phash_u64 = await asyncio.to_thread(compute_phash_u64, Image.open(file.file))
+            _upload_cache_put("phash", sha, phash_u64)
+        phash_str = f"{phash_u64:016x}"
+        logger.info("[HASH] Computed pHash: %s", phash_str)
+
+        # ── Archive original to Cloudinary (background) ───────────────────────
         # Keyed by pHash so the verify endpoint can retrieve it for SHA-256 comparison.
-        # overwrite=False ensures a re-registration attempt doesn't overwrite the original.
-        cloudinary_url = ""
+        # The upload file is closed once the response is sent, so the task gets
+        # its own copy — spooled to a temp file on disk, not read into memory.
+        archive_path = await asyncio.to_thread(spool_to_disk, file.file)
+        background_tasks.add_task(archive_original, archive_path, phash_str)
         try:
-            upload_result = cloudinary.uploader.upload(
-                io.BytesIO(data),
-                folder="veritas",
-                public_id=f"artwork_{phash_str}",
-                resource_type="image",
-                overwrite=False,
-            )
-            cloudinary_url = upload_result.get("secure_url", "")
-            print(f"[CLOUDINARY] Uploaded: {cloudinary_url}")
-        except Exception as ce:
-            # Cloudinary failure is non-fatal — hash computation still succeeds.
-            # SHA-256 derivative check will be skipped at verify time.
-            print(f"[CLOUDINARY] Upload error (non-fatal): {ce}")
+            cloudinary_url = cloudinary.CloudinaryImage(f"veritas/artwork_{phash_str}").build_url(secure=True)
+        except Exception:
+            cloudinary_url = ""   # Cloudinary not configured
 
         return {"phash": phash_str, "status": "ok", "cloudinary_url": cloudinary_url}
     except Exception as e:
@@ -483,76 +1042,89 @@ async def verify_artwork(file: UploadFile = File(...)):
 
     Layer 2 — 13-Transform Symmetry + Zoom Loop
         The suspect image is tested in 13 orientations (8 D4 symmetry transforms
-        + 5 zoom-out variants). Returns the minimum Hamming distance found.
+        + 5 zoom-out variants), in that order. Returns the best Hamming distance
+        found before the early exit: the scan stops at the first transform within
+        EARLY_EXIT_DISTANCE (2), so a close match may be reported at up to 2 bits
+        even when a later transform would have scored lower. Otherwise all 13 are
+        tested and the score is their minimum.
 
     Layer 3 — SHA-256 Derivative Check (distance = 0 only)
         If pHash distance = 0, compares SHA-256 of the uploaded file against the
         Cloudinary-archived original. Detects sketches, filters, and stylised
         re-renders that share the same visual structure but differ in bytes.
 
-    Verdict Thresholds
-    ------------------
+    Verdict Thresholds (distance = the reported best score)
+    -------------------------------------------------------
         distance = 0, SHA-256 match    →  "Original"           (exact file)
         distance = 0, SHA-256 mismatch →  "Plagiarism Detected" (derivative)
         distance 1–15                  →  "Plagiarism Detected" (modified copy)
         distance > 15                  →  "Clear"              (new artwork)
 
-    All registry data is read live from Algorand Testnet — no local cache.
+    The early exit never changes the verdict: the exact registered file scores
+    0 on "Original", which is tested first. A modified copy may report a small
+    non-zero score where a full scan would have found 0 under another
+    transform; it is "Plagiarism Detected" either way.
+
+    Registry data is read from Algorand Testnet via the short-lived registry
+    cache (see fetch_registry_from_chain).
     """
     try:
-        data = await file.read()
-        img  = Image.open(io.BytesIO(data))
-
-        # ── Pull live registry from Algorand Testnet ──────────────────────────
-        registry = fetch_registry_from_chain()
+        # Hashing, decoding and scoring are CPU-bound and release the GIL for
+        # most of their run — all of it goes to worker threads so the event
+        # loop keeps serving other requests meanwhile.
+
+        # Stream the upload through SHA-256 — raw bytes are never buffered.
+        # Keys the upload cache and the Layer 3 derivative check below.
+        uploaded_sha = await asyncio.to_thread(upload_sha256, file.file)
+        cached_suspects = _upload_cache_get("suspects", uploaded_sha)
+
+        if cached_suspects is None:
+            # Decode straight from Starlette's spooled upload file (no in-memory
+            # bytes copy) and normalise to RGB once
+            img = await asyncio.to_thread(decode_upload, file.file)
+
+        # ── Pull registry from Algorand Testnet (TTL-cached snapshot) ───────────
+        snapshot      = await _load_registry()
+        registry      = snapshot["data"]
+        stored_hashes = snapshot["hashes"]     # parsed once per registry refresh
+
+        if snapshot["failed"]:
+            return {
+                "status": "Registry Unavailable",
+                "error": f"Could not read the registry of App {APP_ID} from Testnet. Please try again in a moment.",
+            }
 
-        if not registry:
+        if not registry or stored_hashes.size == 0:
             return {
                 "status": "No Registry",
                 "message": f"No artworks found in App {APP_ID} on Testnet. Register one first.",
             }
 
-        # ── Run all 13 transforms and track the best (lowest) Hamming distance ─
-        best_distance   = None
-        best_match_hash = None
-        best_match_owner = None
-        best_transform  = "Original"
-
-        for transform_name, transform_fn in SYMMETRY_TRANSFORMS:
-            try:
-                transformed   = transform_fn(img)
-                suspect_hash  = compute_phash(transformed)
-
-                for stored_hash_str, owner in registry.items():
-                    stored_hash = imagehash.hex_to_hash(stored_hash_str)
-                    # Hamming distance: number of differing bits between the two 64-bit hashes
-                    distance    = suspect_hash - stored_hash
-                    print(f"[VERIFY] {transform_name:28s} dist={distance:3d} vs {stored_hash_str[:8]}...")
-
-                    if best_distance is None or distance < best_distance:
-                        best_distance    = distance
-                        best_match_hash  = stored_hash_str
-                        best_match_owner = owner
-                        best_transform   = transform_name
-
-                    # Exact match — no need to continue testing further transforms
-                    if best_distance == 0:
-                        break
-
-            except Exception as te:
-                print(f"[VERIFY] Transform error ({transform_name}): {te}")
-                continue
-
-            if best_distance == 0:
-                break
+        # ── Run the transforms, tracking the best Hamming distance (early exit) ─
+        suspects = cached_suspects if cached_suspects is not None else suspect_hashes(img)
+        best_distance, best_index, best_transform, scanned, complete = await asyncio.to_thread(
+            score_suspects, suspects, snapshot,
+        )
+        # Only a complete scan is cached — an early exit skipped transforms
+        # that a later (changed) registry might still need
+        if complete and cached_suspects is None:
+            _upload_cache_put("suspects", uploaded_sha, scanned)
+        # The "Original" hash is this file's registration hash — seed it so a
+        # verify-then-register flow skips straight past /compute-hash's pipeline
+        if scanned and scanned[0][0] == "Original":
+            _upload_cache_put("phash", uploaded_sha, scanned[0][1])
+
+        best_match_hash  = snapshot["hexes"][best_index] if best_index is not None else None
+        best_match_owner = snapshot["owners"][best_index] if best_index is not None else None
 
         detection_method = f"Detected via {best_transform}"
 
         # ── Layer 3: SHA-256 derivative check (distance = 0 only) ─────────────
         if best_distance == 0:
-            uploaded_sha = hashlib.sha256(data).hexdigest()
-            original_sha = get_original_sha256_from_cloudinary(best_match_hash)
-            print(f"[VERIFY] SHA-256 uploaded={uploaded_sha[:12]}... original={str(original_sha)[:12]}...")
+            # Blocking Cloudinary + HTTP fetch — run on a worker thread so the
+            # event loop keeps serving other requests meanwhile
+            original_sha = await asyncio.to_thread(get_original_sha256_from_cloudinary, best_match_hash)
+            logger.info("[VERIFY] SHA-256 uploaded=%.12s... original=%.12s...", uploaded_sha, original_sha)
 
             if original_sha is not None and uploaded_sha != original_sha:
                 # pHash matched but bytes differ — this is a derivative work
@@ -579,7 +1151,7 @@ async def verify_artwork(file: UploadFile = File(...)):
             }
 
         # ── Plagiarism: close enough to be a modified copy ────────────────────
-        if best_distance <= 15:
+        if best_distance <= PLAGIARISM_DISTANCE:
             return {
                 "status": "Plagiarism Detected",
                 "score": int(best_distance),
@@ -603,6 +1175,63 @@ async def verify_artwork(file: UploadFile = File(...)):
         return {"error": str(e)}
 
 
+def forensic_report(f) -> dict:
+    """Run the /analyze pipeline on a spooled upload file; see analyze_artwork."""
+    # Decode straight from Starlette's spooled upload file (no bytes copy)
+    img = Image.open(f)
+
+    # ── Stage 1: Median Blur (adversarial noise defense) ──────────────────────
+    denoised_rgb = denoise(img)
+
+    # ── Stage 2: Grayscale + 32×32 resize (denoised) ─────────────────────────
+    gray = denoised_rgb.convert("L").resize((32, 32), Image.LANCZOS)
+    buf  = io.BytesIO()    # reused for both 32×32 PNG encodes
+    gray.save(buf, format="PNG")
+    gray_b64 = base64.b64encode(buf.getbuffer()).decode("utf-8")
+
+    # ── Stage 2 (raw): same resize without denoising — for visual comparison
+    gray_original = img.convert("L").resize((32, 32), Image.LANCZOS)
+    buf.seek(0)
+    buf.truncate(0)
+    gray_original.save(buf, format="PNG")
+    gray_original_b64 = base64.b64encode(buf.getbuffer()).decode("utf-8")
+
+    # ── Stages 3–5: 8×8 low-pass DCT → Median Bitmask → 64-bit pHash ─────────
+    # Same kernel as /verify and /compute-hash (phash_kernel): only the
+    # top-left 64 DCT coefficients are computed and all 64 (DC included) are
+    # thresholded at their median. The bitmask shown is therefore exactly
+    # the hash returned and stored on-chain — no second pHash pass is needed.
+    pixels = np.asarray(gray, dtype=np.uint8)
+    arr = pixels.astype(np.float64)
+    low_freqs, medians, masks = phash_kernel(arr[None])
+    low_freq       = low_freqs[0]                      # (8, 8)
+    median_val     = float(medians[0])
+    mask           = masks[0]                          # (64,) bool
+    packed         = np.packbits(mask).tobytes()       # 8 bytes, MSB-first
+    official_phash = packed.hex()
+    binary_str     = f"{int.from_bytes(packed, 'big'):064b}"
+
+    # Normalise DCT heatmap to 0–255 range for frontend colour rendering
+    dct_norm = low_freq.copy()
+    dct_min, dct_max = dct_norm.min(), dct_norm.max()
+    if dct_max != dct_min:
+        dct_norm = (dct_norm - dct_min) / (dct_max - dct_min) * 255
+    dct_flat = dct_norm.astype("<f4").ravel()
+
+    logger.info("[ANALYZE] pHash: %s | Median: %.2f", official_phash, median_val)
+
+    return {
+        "phash_hex":        official_phash,
+        "phash_binary":     binary_str,
+        "median_frequency": round(median_val, 4),
+        "bitmask_b64":      base64.b64encode(packed).decode("ascii"),
+        "dct_heatmap_b64":  base64.b64encode(dct_flat.tobytes()).decode("ascii"),
+        "gray_32x32_b64":   gray_b64,           # denoised — what the algorithm hashes
+        "gray_original_b64": gray_original_b64,  # raw — before denoising, for comparison
+        "pixels_32x32_b64": base64.b64encode(pixels.tobytes()).decode("ascii"),
+    }
+
+
 @app.post("/analyze")
 async def analyze_artwork(file: UploadFile = File(...)):
     """
@@ -616,72 +1245,31 @@ async def analyze_artwork(file: UploadFile = File(...)):
     ------------------------
     gray_original_b64 : 32×32 grayscale before denoising  (raw input)
     gray_32x32_b64    : 32×32 grayscale after Median Blur  (denoised)
-    dct_heatmap       : 8×8 DCT low-pass coefficients, normalised 0–255
-    bitmask_8x8       : 64-bit binary array (each coeff > median → 1)
+    dct_heatmap_b64   : 8×8 DCT low-pass coefficients, normalised 0–255
+                        (base64 of 64 little-endian float32, row-major)
+    bitmask_b64       : 64-bit bitmask, each coeff > median → 1
+                        (base64 of 8 packed bytes, MSB-first)
     phash_hex         : final 64-bit pHash (hex string)
     phash_binary      : final 64-bit pHash (binary string)
     median_frequency  : the median DCT coefficient value used as threshold
-    pixels_32x32      : raw 32×32 pixel values (for frontend rendering)
+    pixels_32x32_b64  : raw 32×32 uint8 pixel values (base64, row-major)
+
+    The array payloads are shipped as base64'd raw bytes rather than JSON
+    number lists — a fraction of the size and encoding cost.
     """
     try:
-        data = await file.read()
-        img  = Image.open(io.BytesIO(data))
-
-        # ── Stage 1: Median Blur (adversarial noise defense) ──────────────────
-        denoised_rgb = denoise(img)
-
-        # ── Stage 2: Grayscale + 32×32 resize (denoised) ─────────────────────
-        gray = denoised_rgb.convert("L").resize((32, 32), Image.LANCZOS)
-        buf  = io.BytesIO()
-        gray.save(buf, format="PNG")
-        gray_b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
-
-        # ── Stage 2 (raw): same resize without denoising — for visual comparison
-        gray_original = img.convert("L").resize((32, 32), Image.LANCZOS)
-        buf2 = io.BytesIO()
-        gray_original.save(buf2, format="PNG")
-        gray_original_b64 = base64.b64encode(buf2.getvalue()).decode("utf-8")
-
-        pixels = list(gray.getdata())
-
-        # ── Stage 3: 2D DCT ───────────────────────────────────────────────────
-        arr        = np.array(gray, dtype=float)
-        dct_matrix = dctn_numpy(arr)
-
-        # ── Stage 4: 8×8 Low-Pass Filter (keep top-left 64 coefficients) ──────
-        low_freq    = dct_matrix[:8, :8]
-        coeffs_full = low_freq.flatten()
-
-        # ── Stage 5: Median Bitmask → 64-bit pHash ────────────────────────────
-        # Exclude DC component (index 0) from median calculation — it encodes
-        # average brightness which would skew the threshold.
-        coeffs_no_dc = coeffs_full[1:]
-        median_val   = float(np.median(coeffs_no_dc))
-        bits         = [1 if float(c) > median_val else 0 for c in coeffs_full]
-        binary_str   = "".join(str(b) for b in bits)
-
-        # Use imagehash's own phash for the canonical hex output (ensures consistency)
-        official_phash = str(imagehash.phash(denoised_rgb))
-
-        # Normalise DCT heatmap to 0–255 range for frontend colour rendering
-        dct_norm = low_freq.copy()
-        dct_min, dct_max = dct_norm.min(), dct_norm.max()
-        if dct_max != dct_min:
-            dct_norm = (dct_norm - dct_min) / (dct_max - dct_min) * 255
-        dct_flat = [float(v) for v in dct_norm.flatten()]
-
-        print(f"[ANALYZE] pHash: {official_phash} | Median: {median_val:.2f}")
-
-        return {
-            "phash_hex":        official_phash,
-            "phash_binary":     binary_str,
-            "median_frequency": round(median_val, 4),
-            "bitmask_8x8":      bits,
-            "dct_heatmap":      dct_flat,
-            "gray_32x32_b64":   gray_b64,           # denoised — what the algorithm hashes
-            "gray_original_b64": gray_original_b64,  # raw — before denoising, for comparison
-            "pixels_32x32":     pixels,
-        }
+        # Repeat uploads of the same file return the cached report
+        sha = await asyncio.to_thread(upload_sha256, file.file)
+        cached_report = _upload_cache_get("analyze", sha)
+        if cached_report is not None:
+            return cached_report
+
+        # Decode → denoise → DCT is CPU-bound — run it on a worker thread so
+        # the event loop keeps serving other requests meanwhile
+        report = await asyncio.to_thread(forensic_report, file.file)
+        _upload_cache_put("analyze", sha, report)
+        _upload_cache_put("phash", sha, int(report["phash_hex"], 16))
+        return report
 
     except Exception as e:
         return {"error": str(e)}
@@ -693,300 +1281,3 @@ async def analyze_artwork(file: UploadFile = File(...)):
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
-
-
-def get_original_sha256_from_cloudinary(phash_str: str) -> str | None:
-    """
-    Fetch the original registered image from Cloudinary and return its SHA-256.
-    Used to distinguish "exact same file" from "perceptually identical derivative".
-    """
-    try:
-        resource = cloudinary.api.resource(f"veritas/artwork_{phash_str}")
-        url = resource.get("secure_url", "")
-        if url:
-            r = requests.get(url, timeout=15)
-            return hashlib.sha256(r.content).hexdigest()
-    except Exception as e:
-        print(f"[CLOUDINARY] Could not fetch original for SHA-256 comparison: {e}")
-    return None
-
-
-def fetch_registry_from_chain() -> dict:
-    """Read all registered pHashes directly from Algorand Testnet via REST API."""
-    registry: dict = {}
-    try:
-        resp = requests.get(f"{ALGOD_URL}/v2/applications/{APP_ID}/boxes", timeout=10)
-        box_list = resp.json().get("boxes", [])
-        print(f"[CHAIN] Found {len(box_list)} box(es) in App {APP_ID}")
-
-        for box_ref in box_list:
-            box_name_b64 = box_ref["name"]
-            box_name_bytes = base64.b64decode(box_name_b64)
-            raw_key = box_name_bytes.decode("utf-8", errors="replace")
-            BOX_PREFIX = "registered_hashes"
-            phash_hex = raw_key[len(BOX_PREFIX):] if raw_key.startswith(BOX_PREFIX) else raw_key
-
-            box_resp = requests.get(
-                f"{ALGOD_URL}/v2/applications/{APP_ID}/box",
-                params={"name": f"b64:{box_name_b64}"},
-                timeout=10,
-            )
-            value_bytes = base64.b64decode(box_resp.json().get("value", ""))
-            owner_address = encode_algorand_address(value_bytes)
-
-            registry[phash_hex] = owner_address
-            print(f"[CHAIN] Loaded: {phash_hex[:8]}... -> {owner_address[:8]}...")
-
-    except Exception as e:
-        print(f"[CHAIN] Error reading boxes: {e}")
-
-    return registry
-
-
-@app.post("/compute-hash")
-async def compute_hash(file: UploadFile = File(...)):
-    """
-    STEP 1 for the frontend: Compute the 64-bit pHash of the uploaded image.
-    Returns the hex hash so the frontend can build a smart contract transaction
-    and sign it with Pera Wallet (the actual on-chain write happens in the browser).
-    """
-    try:
-        data = await file.read()
-        img = Image.open(io.BytesIO(data))
-        phash = compute_phash(img)
-        phash_str = str(phash)
-        print(f"[HASH] Computed pHash: {phash_str}")
-
-        # ── Upload original image to Cloudinary ────────────────────────────
-        cloudinary_url = ""
-        try:
-            upload_result = cloudinary.uploader.upload(
-                io.BytesIO(data),
-                folder="veritas",
-                public_id=f"artwork_{phash_str}",
-                resource_type="image",
-                overwrite=False,
-            )
-            cloudinary_url = upload_result.get("secure_url", "")
-            print(f"[CLOUDINARY] Uploaded: {cloudinary_url}")
-        except Exception as ce:
-            print(f"[CLOUDINARY] Upload error (non-fatal): {ce}")
-
-        return {"phash": phash_str, "status": "ok", "cloudinary_url": cloudinary_url}
-    except Exception as e:
-        return {"error": str(e)}
-
-
-@app.post("/verify")
-async def verify_artwork(file: UploadFile = File(...)):
-    """
-    VERIFIER endpoint: Multi-layered forensic scan against the live Testnet registry.
-      Layer 1 — Adversarial Noise Defense (Median Blur)
-      Layer 2 — 8-Way Symmetry Invariance (D4 group)
-      Layer 3 — pHash Hamming Distance on DCT skeleton
-    Reads registry LIVE from Algorand Testnet BoxMap — no local cache.
-    """
-    try:
-        data = await file.read()
-        img = Image.open(io.BytesIO(data))
-
-        # Pull registry fresh from the blockchain
-        registry = fetch_registry_from_chain()
-
-        if not registry:
-            return {
-                "status": "No Registry",
-                "message": f"No artworks found in App {APP_ID} on Testnet. Register one first."
-            }
-
-        best_distance = None
-        best_match_hash = None
-        best_match_owner = None
-        best_transform = "Original"
-
-        for transform_name, transform_fn in SYMMETRY_TRANSFORMS:
-            try:
-                transformed = transform_fn(img)
-                suspect_hash = compute_phash(transformed)
-
-                for stored_hash_str, owner in registry.items():
-                    stored_hash = imagehash.hex_to_hash(stored_hash_str)
-                    distance = suspect_hash - stored_hash
-                    print(f"[VERIFY] {transform_name:28s} dist={distance:3d} vs {stored_hash_str[:8]}...")
-
-                    if best_distance is None or distance < best_distance:
-                        best_distance = distance
-                        best_match_hash = stored_hash_str
-                        best_match_owner = owner
-                        best_transform = transform_name
-
-                    if best_distance == 0:
-                        break
-
-            except Exception as te:
-                print(f"[VERIFY] Transform error ({transform_name}): {te}")
-                continue
-
-            if best_distance == 0:
-                break
-
-        detection_method = f"Detected via {best_transform}"
-
-        if best_distance == 0:
-            # pHash is perceptually identical — now check if bytes are actually the same.
-            # A sketch/filter/stylised version can produce the same pHash as the original
-            # but is a different file → should be Plagiarism Detected, not Original Verified.
-            uploaded_sha = hashlib.sha256(data).hexdigest()
-            original_sha = get_original_sha256_from_cloudinary(best_match_hash)
-            print(f"[VERIFY] SHA-256 uploaded={uploaded_sha[:12]}... original={str(original_sha)[:12]}...")
-
-            if original_sha is not None and uploaded_sha != original_sha:
-                # Same perceptual structure, different file — derivative work
-                return {
-                    "status": "Plagiarism Detected",
-                    "score": 0,
-                    "matched_hash": best_match_hash,
-                    "owner": best_match_owner,
-                    "detection_method": f"{detection_method} (near-identical derivative — same composition, different file)",
-                    "app_id": APP_ID,
-                    "network": "Testnet",
-                }
-
-            # SHA-256 matches (or Cloudinary unavailable) — treat as genuine original
-            return {
-                "status": "Original",
-                "score": 0,
-                "matched_hash": best_match_hash,
-                "owner": best_match_owner,
-                "detection_method": detection_method,
-                "app_id": APP_ID,
-                "network": "Testnet",
-            }
-
-        if best_distance <= 15:
-            return {
-                "status": "Plagiarism Detected",
-                "score": int(best_distance),
-                "matched_hash": best_match_hash,
-                "owner": best_match_owner,
-                "detection_method": detection_method,
-                "app_id": APP_ID,
-                "network": "Testnet",
-            }
-
-        return {
-            "status": "Clear",
-            "score": int(best_distance),
-            "detection_method": f"All 8 orientations tested — best: {best_transform} (dist={best_distance})",
-            "app_id": APP_ID,
-            "network": "Testnet",
-        }
-
-    except Exception as e:
-        return {"error": str(e)}
-
-
-@app.get("/")
-async def root():
-    return {"status": "ok", "message": "Veritas Protocol API is running", "endpoints": ["/registry", "/compute-hash", "/verify", "/analyze"]}
-
-
-@app.get("/algod/params")
-async def algod_params():
-    """Proxy: fetch suggested transaction params from AlgoNode (avoids browser 403)."""
-    try:
-        r = requests.get(f"{ALGOD_URL}/v2/transactions/params", timeout=10)
-        return r.json()
-    except Exception as e:
-        return {"error": str(e)}
-
-
-@app.get("/algod/account/{address}")
-async def algod_account(address: str):
-    """Proxy: fetch account info from AlgoNode (avoids browser 403)."""
-    try:
-        r = requests.get(f"{ALGOD_URL}/v2/accounts/{address}", timeout=10)
-        return r.json()
-    except Exception as e:
-        return {"error": str(e)}
-
-
-@app.get("/registry")
-async def get_registry():
-    """Returns registry read live from Algorand Testnet boxes."""
-    try:
-        registry = fetch_registry_from_chain()
-        return {
-            "count": len(registry),
-            "app_id": APP_ID,
-            "network": "Testnet",
-            "hashes": [
-                {"phash": h, "owner": o, "short": h[:8] + "..."}
-                for h, o in registry.items()
-            ]
-        }
-    except Exception as e:
-        return {"error": str(e), "count": 0, "hashes": []}
-
-
-@app.post("/analyze")
-async def analyze_artwork(file: UploadFile = File(...)):
-    """
-    FORENSIC endpoint: Full multi-layer pipeline visualisation.
-    Steps: Median Blur → Grayscale 32×32 → 2D DCT → 8×8 low-pass → Median bitmask
-    """
-    try:
-        data = await file.read()
-        img = Image.open(io.BytesIO(data))
-
-        denoised_rgb = denoise(img)
-        gray = denoised_rgb.convert("L").resize((32, 32), Image.LANCZOS)
-
-        buf = io.BytesIO()
-        gray.save(buf, format="PNG")
-        gray_b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
-
-        gray_original = img.convert("L").resize((32, 32), Image.LANCZOS)
-        buf2 = io.BytesIO()
-        gray_original.save(buf2, format="PNG")
-        gray_original_b64 = base64.b64encode(buf2.getvalue()).decode("utf-8")
-
-        pixels = list(gray.getdata())
-
-        arr = np.array(gray, dtype=float)
-        dct_matrix = dctn_numpy(arr)
-        low_freq = dct_matrix[:8, :8]
-        coeffs_full = low_freq.flatten()
-        coeffs_no_dc = coeffs_full[1:]
-
-        median_val = float(np.median(coeffs_no_dc))
-        bits = [1 if float(c) > median_val else 0 for c in coeffs_full]
-        binary_str = "".join(str(b) for b in bits)
-        official_phash = str(imagehash.phash(denoised_rgb))
-
-        dct_norm = low_freq.copy()
-        dct_min, dct_max = dct_norm.min(), dct_norm.max()
-        if dct_max != dct_min:
-            dct_norm = (dct_norm - dct_min) / (dct_max - dct_min) * 255
-        dct_flat = [float(v) for v in dct_norm.flatten()]
-
-        print(f"[ANALYZE] pHash: {official_phash} | Median: {median_val:.2f}")
-
-        return {
-            "phash_hex": official_phash,
-            "phash_binary": binary_str,
-            "median_frequency": round(median_val, 4),
-            "bitmask_8x8": bits,
-            "dct_heatmap": dct_flat,
-            "gray_32x32_b64": gray_b64,
-            "gray_original_b64": gray_original_b64,
-            "pixels_32x32": pixels,
-        }
-
-    except Exception as e:
-        return {"error": str(e)}
-
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,129 @@
+"""
+Regression check: the NumPy pHash kernel must reproduce imagehash.phash().
+
+Every hash already stored in the on-chain registry was produced by
+imagehash.phash(img.convert("RGB").filter(MedianFilter(3))), so any bit the
+kernel flips turns an owner's own upload into "Plagiarism Detected". Flat,
+centred and striped artwork is the risky case: symmetry cancels DCT
+coefficients to exact zeros in scipy.fftpack but leaves rounding residue in
+a matmul.
+
+Needs the reference implementation:  pip install -r requirements-dev.txt
+(from Veritas/api), then run  python -m pytest tests
+"""
+
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFilter
+
+imagehash = pytest.importorskip("imagehash")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import main  # noqa: E402
+
+REPO_IMAGE = Path(__file__).resolve().parents[3] / "IMG_2957(1).PNG"
+
+
+def reference_phash(img: Image.Image) -> int:
+    """The registration-time hash every on-chain entry was built with."""
+    return int(str(imagehash.phash(img.convert("RGB").filter(ImageFilter.MedianFilter(3)))), 16)
+
+
+def _solid(size, colour):
+    return Image.new("RGB", size, colour)
+
+
+def _centred_square(size, fill="red"):
+    img = Image.new("RGB", size, "white")
+    w, h = size
+    ImageDraw.Draw(img).rectangle([w // 4, h // 4, 3 * w // 4, 3 * h // 4], fill=fill)
+    return img
+
+
+def _stripes(size, period, vertical=True):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    w, h = size
+    for p in range(0, w if vertical else h, period):
+        box = [p, 0, p + period // 2 - 1, h] if vertical else [0, p, w, p + period // 2 - 1]
+        draw.rectangle(box, fill="black")
+    return img
+
+
+def _two_tone(size, c1, c2, vertical):
+    img = Image.new("RGB", size, c1)
+    w, h = size
+    ImageDraw.Draw(img).rectangle([0, 0, w // 2, h] if vertical else [0, 0, w, h // 2], fill=c2)
+    return img
+
+
+def _checkerboard(size, cell):
+    w, h = size
+    yy, xx = np.mgrid[:h, :w]
+    return Image.fromarray((((xx // cell) + (yy // cell)) % 2 * 255).astype(np.uint8)).convert("RGB")
+
+
+FIXTURES = {
+    "solid-white-300x200":   _solid((300, 200), "white"),
+    "solid-black-64x64":     _solid((64, 64), "black"),
+    "solid-grey-1000x700":   _solid((1000, 700), (128, 128, 128)),
+    "solid-red-33x77":       _solid((33, 77), (200, 30, 40)),
+    "centred-square-300x200": _centred_square((300, 200)),
+    "centred-square-401x333": _centred_square((401, 333), fill="blue"),
+    "vstripes-300x200":      _stripes((300, 200), 20),
+    "hstripes-256x256":      _stripes((256, 256), 16, vertical=False),
+    "two-tone-vertical":     _two_tone((240, 160), (20, 120, 200), (250, 250, 10), True),
+    "two-tone-horizontal":   _two_tone((123, 321), (0, 0, 0), (255, 255, 255), False),
+    "checkerboard-8":        _checkerboard((256, 256), 8),
+    "checkerboard-13":       _checkerboard((300, 200), 13),
+}
+
+
+def _repo_crops(count=60):
+    """Small flat JPEG crops of the repo's own artwork."""
+    if not REPO_IMAGE.exists():
+        return {}
+    rng = np.random.default_rng(0)
+    src = Image.open(REPO_IMAGE).convert("RGB")
+    w, h = src.size
+    crops = {}
+    for n in range(count):
+        x, y = (int(v) for v in rng.integers(0, (w - 40, h - 40)))
+        s = int(rng.integers(16, 120))
+        buf = io.BytesIO()
+        src.crop((x, y, min(w, x + s), min(h, y + s))).save(buf, "JPEG", quality=int(rng.integers(50, 95)))
+        buf.seek(0)
+        crops[f"repo-crop-{n}"] = Image.open(buf)
+    return crops
+
+
+FIXTURES.update(_repo_crops())
+
+
+@pytest.mark.parametrize("name", sorted(FIXTURES))
+def test_compute_phash_matches_imagehash(name):
+    img = FIXTURES[name]
+    assert f"{main.compute_phash_u64(img):016x}" == f"{reference_phash(img):016x}"
+
+
+def test_solid_colour_hash_is_dc_bit_only():
+    # Flat artwork: only the DC coefficient exceeds the (zero) median
+    assert f"{main.compute_phash_u64(_solid((300, 200), 'white')):016x}" == "8000000000000000"
+
+
+@pytest.mark.parametrize("name", ["solid-white-300x200", "centred-square-300x200", "vstripes-300x200"])
+def test_verify_original_matches_registration_hash(name):
+    img = main.as_rgb(FIXTURES[name])
+    suspects = dict(main.suspect_hashes(img))
+    assert suspects["Original"] == reference_phash(img)
+
+
+@pytest.mark.parametrize("name", ["centred-square-401x333", "checkerboard-13"])
+def test_denoise_matches_pillow_median_filter(name):
+    img = FIXTURES[name]
+    expected = np.asarray(img.convert("RGB").filter(ImageFilter.MedianFilter(3)))
+    assert np.array_equal(np.asarray(main.denoise(img)), expected)
@@ -0,0 +1,101 @@
+"""
+Registry snapshot cache: concurrent requests that find the snapshot stale
+share one chain read, and a failed read is handed to all of them at once
+instead of being retried serially by each waiter. A failed re-read keeps
+serving the last good snapshot.
+"""
+
+import asyncio
+import io
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import main  # noqa: E402
+
+READ_SECONDS = 0.3
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """Stub chain reader that counts calls and can be told to fail."""
+    state = {"reads": 0, "fail": False}
+
+    async def read_boxes():
+        state["reads"] += 1
+        boxes = dict(state.get("boxes", {"ab" * 8: "OWNER"}))    # as on chain when the read starts
+        await asyncio.sleep(READ_SECONDS)
+        if state["fail"]:
+            raise RuntimeError("algod unreachable")
+        return boxes
+
+    monkeypatch.setattr(main, "_read_registry_boxes", read_boxes)
+    monkeypatch.setattr(main, "_REGISTRY_CACHE", {**main._REGISTRY_CACHE, "ts": 0.0, "app_id": None})
+    return state
+
+
+async def _concurrent_loads(count=5):
+    start = time.monotonic()
+    snapshots = await asyncio.gather(*(main._load_registry() for _ in range(count)))
+    return snapshots, time.monotonic() - start
+
+
+def test_concurrent_refreshes_share_one_read(chain):
+    snapshots, elapsed = asyncio.run(_concurrent_loads())
+    assert chain["reads"] == 1
+    assert elapsed < 2 * READ_SECONDS
+    assert all(s["data"] == {"ab" * 8: "OWNER"} for s in snapshots)
+
+
+def test_failed_read_is_shared_then_retried(chain):
+    chain["fail"] = True
+    snapshots, elapsed = asyncio.run(_concurrent_loads())
+    assert chain["reads"] == 1
+    assert elapsed < 2 * READ_SECONDS
+    assert all(s["data"] == {} for s in snapshots)
+
+    # The failure was not cached: the next request re-reads the chain
+    chain["fail"] = False
+    assert asyncio.run(main._load_registry())["data"] == {"ab" * 8: "OWNER"}
+    assert chain["reads"] == 2
+
+
+def test_failed_reread_keeps_last_good_snapshot(chain):
+    asyncio.run(main._load_registry())
+    main._REGISTRY_CACHE["ts"] = 0.0          # expire it
+
+    chain["fail"] = True
+    snapshot = asyncio.run(main._load_registry())
+    assert snapshot["data"] == {"ab" * 8: "OWNER"}
+    assert not snapshot["failed"]
+
+    # Still expired: the next request goes back to the chain
+    asyncio.run(main._load_registry())
+    assert chain["reads"] == 3
+
+
+def test_verify_reports_unreadable_registry(chain):
+    chain["fail"] = True
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 64), "white").save(buf, "PNG")
+    res = TestClient(main.app).post("/verify", files={"file": ("art.png", buf.getvalue(), "image/png")})
+    assert res.json()["status"] == "Registry Unavailable"
+
+
+def test_forced_refresh_does_not_join_an_older_read(chain):
+    async def register_during_read():
+        stale = asyncio.create_task(main._load_registry())
+        await asyncio.sleep(READ_SECONDS / 3)
+        chain["boxes"] = {"ab" * 8: "OWNER", "cd" * 8: "NEW_OWNER"}   # registration confirmed
+        forced = await main._load_registry(force_refresh=True)
+        await stale
+        return forced
+
+    forced = asyncio.run(register_during_read())
+    assert "cd" * 8 in forced["data"]
+    assert "cd" * 8 in asyncio.run(main._load_registry())["data"]
@@ -0,0 +1,46 @@
+"""
+Upload size cap: the 413 must fire for chunked bodies too, not only when the
+client sends a Content-Length over MAX_UPLOAD_BYTES.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import main  # noqa: E402
+
+HEADERS = {"Content-Type": "multipart/form-data; boundary=veritas", "Origin": "https://example.org"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1000)
+    return TestClient(main.app)
+
+
+def _chunks(count, size=300):
+    # A generator body is streamed without a Content-Length header
+    for _ in range(count):
+        yield b"x" * size
+
+
+def test_content_length_over_cap_is_rejected(client):
+    res = client.post("/verify", content=b"x" * 2000, headers=HEADERS)
+    assert res.status_code == 413
+    assert "Upload too large" in res.json()["error"]
+    assert res.headers["access-control-allow-origin"] == "*"
+
+
+def test_chunked_body_over_cap_is_rejected(client):
+    res = client.post("/verify", content=_chunks(10), headers=HEADERS)
+    assert res.status_code == 413
+    assert "Upload too large" in res.json()["error"]
+    assert res.headers["access-control-allow-origin"] == "*"
+
+
+def test_chunked_body_under_cap_reaches_endpoint(client):
+    res = client.post("/verify", content=_chunks(2), headers=HEADERS)
+    assert res.status_code != 413
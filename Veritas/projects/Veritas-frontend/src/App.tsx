@@ -25,6 +25,11 @@ interface ForensicData {
   gray_original_b64: string  // raw — before median blur, for comparison
 }
 
+// /analyze ships its arrays as base64'd raw bytes — decode them for rendering
+const b64Bytes = (b64: string) => Uint8Array.from(atob(b64), (c) => c.charCodeAt(0))
+const decodeFloat32 = (b64: string) => Array.from(new Float32Array(b64Bytes(b64).buffer))
+const decodeBits = (b64: string) => Array.from(b64Bytes(b64), (byte) => [7, 6, 5, 4, 3, 2, 1, 0].map((i) => (byte >> i) & 1)).flat()
+
 // Pipeline step descriptions shown in the forensic panel
 const PIPELINE_STEPS = [
   {
@@ -280,8 +285,9 @@ export default function App() {
     return () => clearInterval(id)
   }, [])
 
+  // Called right after a registration — bypass the backend's registry cache
   const fetchRegistryCount = useCallback(() => {
-    fetch(`${API}/registry`)
+    fetch(`${API}/registry?refresh=true`)
       .then(r => r.json())
       .then(data => setRegistryCount(data.count ?? 0))
       .catch(() => { /* ignore */ })
@@ -292,7 +298,8 @@ export default function App() {
     for (let i = 0; i < retries; i++) {
       try {
         const res = await fetch(url, options)
-        if (res.ok) return res
+        // 413 (upload too large) is final — surface its error instead of retrying
+        if (res.ok || res.status === 413) return res
       } catch { /* retry */ }
       if (i < retries - 1) await new Promise(r => setTimeout(r, delayMs))
     }
@@ -411,6 +418,16 @@ export default function App() {
     try {
       const res = await fetchWithRetry(`${API}/verify`, { method: 'POST', body: formData })
       const data = await res.json()
+      if (data.status === 'Registry Unavailable') {
+        setVerifyStatus({ type: 'error', message: 'Could not read the on-chain registry right now. Please try again in a moment.' })
+        return
+      }
+      // Only the 413 size-cap message is shown as-is; any other backend error
+      // can carry internal detail and falls through to the generic message below
+      if (res.status === 413) {
+        setVerifyStatus({ type: 'error', message: data.error ?? 'This image is too large to upload.' })
+        return
+      }
       if (data.error) throw new Error(data.error)
 
       if (data.status === 'No Registry') {
@@ -445,10 +462,14 @@ export default function App() {
       const res = await fetchWithRetry(`${API}/analyze`, { method: 'POST', body: formData })
       const data = await res.json()
       if (data.error) throw new Error(data.error)
-      if (!data.phash_binary || !data.phash_hex || !data.dct_heatmap) {
+      if (!data.phash_binary || !data.phash_hex || !data.dct_heatmap_b64 || !data.bitmask_b64) {
         throw new Error('Backend returned incomplete data. It may still be waking up — please try again in a moment.')
       }
-      setForensicData(data as ForensicData)
+      setForensicData({
+        ...data,
+        bitmask_8x8: decodeBits(data.bitmask_b64),
+        dct_heatmap: decodeFloat32(data.dct_heatmap_b64),
+      } as ForensicData)
     } catch (e: unknown) {
       setForensicError(e instanceof Error ? e.message : 'Could not reach the backend. Please try again in a moment.')
     } finally {